@@ -9,7 +9,7 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-from groq import Groq
+from groq import AsyncGroq
 import json
 import os
 import plotly.graph_objects as go
@@ -18,6 +18,11 @@ from datetime import datetime, timedelta
 import pandas as pd
 import time
 import re
+import csv
+import io
+import asyncio
+import threading
+from collections import deque
 
 # Import pymongo for dummy MongoDB connection (add try-except for robustness)
 try:
@@ -26,74 +31,53 @@ except ImportError:
     MongoClient = None # Set to None if pymongo is not installed
     st.warning("`pymongo` not found. Install with `pip install pymongo` to enable dummy MongoDB connection features. Continuing without it.")
 
+# Prefer orjson for parsing data files; fall back to the stdlib parser if it's missing
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 # Import configurations and prompts
 from config import GROQ_API_KEY, GROQ_MODEL_NAME
-from prompts import SYSTEM_PROMPT, PRODUCT_DATA_INSTRUCTION, ORDER_DATA_INSTRUCTION, QUICK_ACTIONS
+import lang_kernel
+from prompts import SYSTEM_PROMPT, PRODUCT_DATA_INSTRUCTION, ORDER_DATA_INSTRUCTION, NO_ORDER_DATA_INSTRUCTION, QUICK_ACTIONS
 
 # Custom CSS for modern aesthetic with improved performance and chat auto-scroll
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    
-    .chat-message {
-        animation: fadeIn 0.5s ease-in;
-        margin-bottom: 1rem;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .voice-controls {
-        background: linear-gradient(45deg, #ff6b6b, #ee5a24);
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 1rem 0;
-        color: white;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(45deg, #667eea, #764ba2);
-        color: white;
-        border: none;
-        border-radius: 20px;
-        padding: 0.5rem 1rem;
-        transition: all 0.3s;
-        width: 100%;
-        margin-bottom: 0.5rem;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-    }
-    
-    .chat-input {
-        border-radius: 25px;
-        border: 2px solid #667eea;
-    }
-    
-    /* Ensure chat stays at bottom */
-    .element-container:has([data-testid="stChatMessage"]) {
-        scroll-margin-bottom: 100px; /* Adjust as needed */
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    """Read the stylesheet once per process"""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles.css")
+    with open(css_path, 'r', encoding='utf-8') as f:
+        return f"<style>\n{f.read()}</style>"
+
+# Emitted on every rerun: Streamlit drops elements a rerun doesn't re-render
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # --- Initialization ---
 
+# Clients are created once per process and shared across reruns
+_GROQ_LOOP_THREAD = "shopease-groq-loop"
+
+@st.cache_resource
+def get_groq():
+    """Background event loop and AsyncGroq client shared by all sessions.
+    Clearing st.cache_resource runs this again, so the loop thread (which carries its loop
+    and client) is looked up by name and reused rather than leaking another one."""
+    thread = next((t for t in threading.enumerate() if t.name == _GROQ_LOOP_THREAD), None)
+    if thread is None:
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name=_GROQ_LOOP_THREAD, daemon=True)
+        thread.loop = loop
+        thread.client = None
+        thread.start()
+    if thread.client is None:
+        thread.client = AsyncGroq(api_key=GROQ_API_KEY)
+    return thread.loop, thread.client
+
 # Initialize Groq client
 try:
-    client = Groq(api_key=GROQ_API_KEY)
+    groq_loop, client = get_groq()
 except Exception as e:
     st.error(f"Failed to initialize Groq client. Please check your API key: {e}")
     st.stop()
@@ -117,8 +101,8 @@ def load_product_data():
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         data_path = os.path.join(current_dir, "data", "products.json")
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(data_path, 'rb') as f:
+            return json_loads(f.read())
     except FileNotFoundError:
         st.error("products.json not found. Make sure it's in the 'data/' directory.")
         return []
@@ -131,8 +115,8 @@ def load_order_data():
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         data_path = os.path.join(current_dir, "data", "orders.json")
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(data_path, 'rb') as f:
+            return json_loads(f.read())
     except FileNotFoundError:
         st.warning("orders.json not found. Creating sample order data.")
         return []
@@ -143,23 +127,106 @@ def load_order_data():
 products = load_product_data()
 orders = load_order_data()
 
-# Prepare data for LLM
-product_info_for_llm = json.dumps(products, indent=2)
-order_info_for_llm = json.dumps(orders, indent=2)
+# Prepare data for LLM - the fields the assistant answers from (internal data like customer_email is left out)
+PRODUCT_FIELDS_FOR_LLM = ("id", "name", "category", "price", "in_stock", "rating", "reviews_count",
+                          "description", "features")
+ORDER_FIELDS_FOR_LLM = ("order_id", "status", "total_amount", "order_date", "items", "shipping_address",
+                        "tracking_number", "estimated_delivery", "delivery_date",
+                        "refund_status", "refund_amount", "refund_reason")
+
+ORDER_COLUMNS_FOR_LLM = ORDER_FIELDS_FOR_LLM + ("latest_update",)
+
+# Order IDs referenced in the conversation decide which order rows go into the prompt
+_ORDER_ID_RE = re.compile(r'ORD\d+', re.IGNORECASE)
+
+def slim_product(p):
+    slim = {k: p[k] for k in PRODUCT_FIELDS_FOR_LLM if k in p}
+    if 'features' in slim:
+        slim['features'] = "; ".join(slim['features'])
+    return slim
+
+def slim_order(o):
+    slim = {k: o[k] for k in ORDER_FIELDS_FOR_LLM if k in o}
+    if 'items' in slim:
+        slim['items'] = "; ".join(
+            f"{item.get('product_name', 'N/A')} ({item.get('product_id', 'N/A')}) x{item.get('quantity', 1)} @ {item.get('price', 'N/A')}"
+            for item in slim['items']
+        )
+    tracking_status = o.get('tracking_status', [])
+    if tracking_status:
+        latest = tracking_status[-1]
+        slim['latest_update'] = f"{latest.get('date', 'N/A')}: {latest.get('status', 'N/A')} at {latest.get('location', 'N/A')}"
+    return slim
 
-system_prompt_with_data = (
-    SYSTEM_PROMPT + "\n\n" + 
-    PRODUCT_DATA_INSTRUCTION.format(product_data=product_info_for_llm) + "\n\n" +
-    ORDER_DATA_INSTRUCTION.format(order_data=order_info_for_llm)
-)
+@st.cache_data
+def slim_product_data():
+    return [slim_product(p) for p in products]
+
+def records_to_csv(records, columns):
+    """Serialize flat records as CSV with a header row (fewer tokens than JSON)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([record.get(col, "") for col in columns] for record in records)
+    return buf.getvalue()
+
+@st.cache_data
+def product_table_for_llm():
+    return records_to_csv(slim_product_data(), PRODUCT_FIELDS_FOR_LLM)
+
+@st.cache_resource
+def get_orders_by_id():
+    """Lookup table for resolving order IDs mentioned in the conversation"""
+    return {o['order_id']: o for o in orders}
+
+@st.cache_data(max_entries=256)  # One entry per distinct set of referenced orders
+def build_system_prompt(order_ids=()):
+    """Assemble the system prompt with the whole product catalog and the given orders"""
+    orders_by_id = get_orders_by_id()
+    if order_ids:
+        order_data = records_to_csv([slim_order(orders_by_id[oid]) for oid in order_ids], ORDER_COLUMNS_FOR_LLM)
+        order_instruction = ORDER_DATA_INSTRUCTION.format(order_data=order_data)
+    else:
+        order_instruction = NO_ORDER_DATA_INSTRUCTION
+    return (
+        SYSTEM_PROMPT + "\n\n" + 
+        PRODUCT_DATA_INSTRUCTION.format(product_data=product_table_for_llm()) + "\n\n" +
+        order_instruction
+    )
+
+# Bound once per script run so the response path doesn't go through the cache decorators on every call
+orders_by_id = get_orders_by_id()
+SYSTEM_PROMPT_CACHED = build_system_prompt()  # No orders referenced
+
+def system_prompt_for(messages):
+    """System prompt carrying only the orders referenced in the given messages"""
+    text = "\n".join(m["content"] for m in messages)
+    order_ids = tuple(dict.fromkeys(
+        oid for oid in (m.upper() for m in _ORDER_ID_RE.findall(text)) if oid in orders_by_id
+    ))
+    if not order_ids:
+        return SYSTEM_PROMPT_CACHED
+    return build_system_prompt(order_ids)
 
 # Initialize session state
+MAX_CHAT_HISTORY = 200  # Oldest messages are dropped beyond this to bound memory
+
+def add_message(role, content, greeting=False):
+    """Append a chat message with a stable id, used for its widget keys"""
+    message = {"id": st.session_state.next_message_id, "role": role, "content": content}
+    if greeting:
+        message["greeting"] = True
+    st.session_state.next_message_id += 1
+    st.session_state.messages.append(message)
+
 if "messages" not in st.session_state:
-    st.session_state.messages = []
-    st.session_state.messages.append({
-        "role": "assistant", 
-        "content": "👋 Hello! I'm ShopEase AI Assistant. I can help you with:\n\n🛒 Order tracking & status\n🔄 Returns & exchanges\n💰 Refunds & payments\n📦 Delivery information\n🛍️ Product recommendations\n\nHow can I assist you today?"
-    })
+    st.session_state.messages = deque(maxlen=MAX_CHAT_HISTORY)
+    st.session_state.next_message_id = 0
+    add_message(
+        "assistant", 
+        "👋 Hello! I'm ShopEase AI Assistant. I can help you with:\n\n🛒 Order tracking & status\n🔄 Returns & exchanges\n💰 Refunds & payments\n📦 Delivery information\n🛍️ Product recommendations\n\nHow can I assist you today?",
+        greeting=True
+    )
 
 if "voice_enabled" not in st.session_state:
     st.session_state.voice_enabled = False
@@ -175,34 +242,43 @@ if "auto_scroll" not in st.session_state:
 
 # --- Helper Functions ---
 
+# Language detection lookups, built once at import time
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]')
+_WORD_RE = re.compile(r'[a-z]+')
+# Common Hindi words in Roman script
+_HINDI_WORDS = frozenset(['mera', 'kya', 'kahan', 'kaise', 'hai', 'mein', 'ka', 'ki', 'ko', 'aur', 'order', 'karna', 'chahta', 'chahte'])
+# Common English words
+_ENGLISH_WORDS = frozenset(['the', 'and', 'or', 'but', 'what', 'how', 'where', 'when', 'why', 'is', 'are', 'can', 'do', 'does', 'will', 'would', 'should', 'could'])
+
+# Messages at least this long are scored by the compiled kernel in lang_kernel.py when Numba is installed
+JIT_LANGUAGE_MIN_CHARS = 512
+
+# Quick action keyword buckets, matched with one compiled alternation
+_QA_RETURN_WORDS = frozenset(['return', 'refund', 'रिटर्न'])
+_QA_ORDER_WORDS = frozenset(['order', 'tracking', 'ऑर्डर'])
+_QA_PAYMENT_WORDS = frozenset(['payment', 'भुगतान'])
+_QA_PRODUCT_WORDS = frozenset(['product', 'उत्पाद'])
+_QA_RE = re.compile(r'(return|refund|रिटर्न|order|tracking|ऑर्डर|payment|भुगतान|product|उत्पाद)', re.IGNORECASE)
+
+
 def detect_language(text):
     """Detect if text is in Hindi or English"""
     # Check for Devanagari script
-    devanagari_pattern = re.compile(r'[\u0900-\u097F]')
-    if devanagari_pattern.search(text):
+    if _DEVANAGARI_RE.search(text):
         return "hi"
     
-    # Check for common Hindi words in Roman script
-    hindi_words = ['mera', 'kya', 'kahan', 'kaise', 'hai', 'mein', 'ka', 'ki', 'ko', 'aur', 'order', 'karna', 'chahta', 'chahte']
-    text_lower = text.lower()
-    
-    # Count Hindi vs English indicators
-    hindi_indicators = 0
-    english_indicators = 0
+    if lang_kernel.AVAILABLE and len(text) >= JIT_LANGUAGE_MIN_CHARS:
+        return "hi" if lang_kernel.score_language(text, _HINDI_WORDS, _ENGLISH_WORDS) > 0 else "en"
     
-    for word in hindi_words:
-        if word in text_lower:
-            hindi_indicators += 1
-    
-    # Common English words
-    english_words = ['the', 'and', 'or', 'but', 'what', 'how', 'where', 'when', 'why', 'is', 'are', 'can', 'do', 'does', 'will', 'would', 'should', 'could']
-    for word in english_words:
-        if word in text_lower:
-            english_indicators += 1
+    # Count Hindi vs English indicators among the words of the message
+    tokens = set(_WORD_RE.findall(text.lower()))
+    hindi_indicators = len(tokens & _HINDI_WORDS)
+    english_indicators = len(tokens & _ENGLISH_WORDS)
     
     # If more Hindi indicators, return Hindi, otherwise English
     return "hi" if hindi_indicators > english_indicators else "en"
 
+@st.cache_data(max_entries=256)
 def text_to_speech_js(text):
     """Generate JavaScript for text-to-speech"""
     # Clean text for speech
@@ -239,14 +315,20 @@ def scroll_to_bottom_js():
     </script>
     """
 
+def run_async(coro):
+    """Run a coroutine on the background event loop and wait for its result.
+    Use asyncio.gather inside the coroutine to overlap independent lookups."""
+    return asyncio.run_coroutine_threadsafe(coro, groq_loop).result()
+
 def generate_response(user_input):
     """Generate AI response with improved error handling"""
     try:
-        # Construct messages for LLM with enhanced context
-        llm_messages = [{"role": "system", "content": system_prompt_with_data}]
-        
         # Add recent context (last 8 messages to manage token limits)
-        recent_messages = st.session_state.messages[-8:]
+        recent_messages = list(st.session_state.messages)[-8:]
+        
+        # Construct messages for LLM with the data relevant to this conversation
+        system_prompt = system_prompt_for(recent_messages + [{"role": "user", "content": user_input}])
+        llm_messages = [{"role": "system", "content": system_prompt}]
         for message in recent_messages:
             llm_messages.append({"role": message["role"], "content": message["content"]})
         
@@ -254,41 +336,53 @@ def generate_response(user_input):
         llm_messages.append({"role": "user", "content": user_input})
 
         # Call Groq API
-        response = client.chat.completions.create(
+        response = run_async(client.chat.completions.create(
             model=GROQ_MODEL_NAME,
             messages=llm_messages,
             stream=False,
             temperature=0.7,
             max_tokens=800
-        )
+        ))
         
         return response.choices[0].message.content
 
     except Exception as e:
         return f"😔 I apologize, but I encountered an error: {e}. Please try again or contact human support."
 
+async def stream_chat_completion(api_messages_payload):
+    """Async generator yielding content chunks from the Groq streaming API."""
+    stream = await client.chat.completions.create(
+        model=GROQ_MODEL_NAME,
+        messages=api_messages_payload,
+        stream=True,
+        temperature=0.7,
+        max_tokens=800
+    )
+    async for chunk in stream:
+        if chunk.choices[0].delta.content is not None:
+            yield chunk.choices[0].delta.content
+
 def generate_response_stream(api_messages_payload): # Modified to accept messages
     """Generate AI response and stream it."""
+    chunks = stream_chat_completion(api_messages_payload)
     try:
-        stream = client.chat.completions.create(
-            model=GROQ_MODEL_NAME,
-            messages=api_messages_payload,
-            stream=True,
-            temperature=0.7,
-            max_tokens=800
-        )
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        while True:
+            try:
+                yield run_async(chunks.__anext__())
+            except StopAsyncIteration:
+                break
     except Exception as e:
         yield f"😔 I apologize, but I encountered an error: {e}."
+    finally:
+        run_async(chunks.aclose())
 
-def add_quick_action_buttons_streamlit(response_text, user_lang="en", message_index=0):
+def add_quick_action_buttons_streamlit(response_text, user_lang="en", message_id=0):
     """Add contextual quick action buttons using Streamlit buttons"""
-    # Determine what buttons to show based on response content
+    # Determine what buttons to show based on response content (single regex pass)
     buttons_to_show = []
+    hits = {m.group(1) for m in _QA_RE.finditer(response_text.lower())}
     
-    if any(word in response_text.lower() for word in ['return', 'refund', 'रिटर्न']):
+    if hits & _QA_RETURN_WORDS:
         if user_lang == "hi":
             buttons_to_show.extend([
                 ("🔄 रिटर्न शुरू करें", "मैं एक आइटम वापस करना चाहता हूं"),
@@ -300,19 +394,19 @@ def add_quick_action_buttons_streamlit(response_text, user_lang="en", message_in
                 ("📋 Return Policy", "What is your return policy?")
             ])
     
-    if any(word in response_text.lower() for word in ['order', 'tracking', 'ऑर्डर']):
+    if hits & _QA_ORDER_WORDS:
         if user_lang == "hi":
             buttons_to_show.append(("📦 दूसरा ऑर्डर ट्रैक करें", "मैं दूसरा ऑर्डर ट्रैक करना चाहता हूं"))
         else:
             buttons_to_show.append(("📦 Track Another Order", "I want to track another order"))
     
-    if any(word in response_text.lower() for word in ['payment', 'भुगतान']):
+    if hits & _QA_PAYMENT_WORDS:
         if user_lang == "hi":
             buttons_to_show.append(("💳 भुगतान विधियां", "भुगतान की विधियां क्या हैं?"))
         else:
             buttons_to_show.append(("💳 Payment Methods", "What payment methods do you accept?"))
     
-    if any(word in response_text.lower() for word in ['product', 'उत्पाद']):
+    if hits & _QA_PRODUCT_WORDS:
         if user_lang == "hi":
             buttons_to_show.append(("🛍️ अधिक उत्पाद", "मुझे और उत्पाद दिखाएं"))
         else:
@@ -327,10 +421,33 @@ def add_quick_action_buttons_streamlit(response_text, user_lang="en", message_in
             col_idx = idx % 3
             with cols[col_idx]:
                 # FIX: Add st.rerun() to quick action buttons to ensure single click functionality
-                if st.button(button_text, key=f"quick_btn_{message_index}_{idx}", use_container_width=True):
+                if st.button(button_text, key=f"quick_btn_{message_id}_{idx}", use_container_width=True):
                     st.session_state.quick_action_trigger = action_text
                     st.rerun() # Trigger a rerun to process the quick action immediately
 
+# Fragments rerun on their own when their buttons are clicked, instead of the whole script
+@st.fragment
+def render_tts_button(text, message_id):
+    """Listen button for a chat message"""
+    if st.button(f"🔊 Listen", key=f"tts_{message_id}"):
+        st.components.v1.html(text_to_speech_js(text), height=0)
+
+@st.fragment
+def render_quick_actions(response_text, user_lang, message_id):
+    """Quick action buttons for the last assistant message"""
+    add_quick_action_buttons_streamlit(response_text, user_lang, message_id)
+
+def queue_quick_action(prompt):
+    """Button callback: runs before the rerun, so the main script picks the prompt up right away"""
+    st.session_state.quick_action_trigger = prompt
+
+def render_quick_action_buttons(actions, key_prefix):
+    """Render one button per {label: prompt} entry; clicking queues the prompt"""
+    for idx, (label, prompt) in enumerate(actions.items()):
+        st.button(label, key=f"{key_prefix}_{idx}", disabled=st.session_state.processing,
+                  on_click=queue_quick_action, args=(prompt,))
+
+@st.cache_data(max_entries=256)
 def create_order_status_card(order_data):
     """Create a formatted order status card instead of timeline"""
     status_emoji = {
@@ -386,6 +503,50 @@ def create_order_status_card(order_data):
     
     return card_html
 
+# Label -> prompt for the quick action buttons under the stats panel
+SIDEBAR_QUICK_ACTIONS = {
+    "📦 Track Order": "I want to track my order",
+    "🛍️ Product Info": "Show me popular products",
+    "🔄 Return Item": "I want to return an item",
+    "💳 Payment Help": "What payment methods do you accept?",
+}
+
+TEST_QUERIES = [
+    "What is the status of order ORD12345?",
+    "Tell me about the Smartwatch Pro X", 
+    "How do I return the Bluetooth headphones?",
+    "Show me electronics products",
+    "What's the refund status for order ORD12348?",
+    "मेरा ऑर्डर ORD12346 कहाँ है?",
+    "Which products have the best ratings?",
+    "Can I change my delivery address?", 
+    "What payment methods do you accept?",
+    "Show me products under ₹100"
+]
+
+ACTIVE_ORDER_STATUSES = {'Processing', 'In Transit'}
+
+@st.cache_data
+def products_df():
+    return pd.DataFrame(products)
+
+@st.cache_data
+def orders_df():
+    return pd.DataFrame(orders)
+
+@st.cache_data
+def compute_stats():
+    """Aggregate product and order counts for the stats panel"""
+    product_frame = products_df()
+    order_frame = orders_df()
+    return {
+        "total_products": len(product_frame),
+        "in_stock_products": int(product_frame['in_stock'].fillna(False).astype(bool).sum()) if 'in_stock' in product_frame else 0,
+        "categories": int(product_frame['category'].nunique()) if 'category' in product_frame else 0,
+        "total_orders": len(order_frame),
+        "active_orders": int(order_frame['status'].isin(ACTIVE_ORDER_STATUSES).sum()) if 'status' in order_frame else 0,
+    }
+
 # --- UI Layout ---
 
 # Header
@@ -410,7 +571,7 @@ if typed_prompt and not st.session_state.processing:
     new_user_prompt_content = typed_prompt
 
 if new_user_prompt_content:
-    st.session_state.messages.append({"role": "user", "content": new_user_prompt_content})
+    add_message("user", new_user_prompt_content)
     st.session_state.processing = True
     # If the prompt comes from quick action or voice, it's processed here,
     # and setting `processing` to True will cause the bot response to generate
@@ -437,17 +598,16 @@ with col1:
     for i, message in enumerate(st.session_state.messages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
-            if message["role"] == "assistant" and i > 0: # For non-initial assistant messages
+            if message["role"] == "assistant" and not message.get("greeting"): # Skip the welcome message
                 # TTS button
-                if st.button(f"🔊 Listen", key=f"tts_{i}"):
-                    st.components.v1.html(text_to_speech_js(message["content"]), height=0)
+                render_tts_button(message["content"], message["id"])
                 
                 # Quick action buttons for the very last assistant message
                 if i == len(st.session_state.messages) - 1 and not st.session_state.processing:
                     user_lang = "en"
                     if i > 0 and st.session_state.messages[i-1]["role"] == "user":
                         user_lang = detect_language(st.session_state.messages[i-1]["content"])
-                    add_quick_action_buttons_streamlit(message["content"], user_lang, i)
+                    render_quick_actions(message["content"], user_lang, message["id"])
 
     # --- Bot Response Generation and Streaming ---
     if st.session_state.processing and st.session_state.messages[-1]["role"] == "user":
@@ -457,28 +617,22 @@ with col1:
                 message_placeholder.markdown("Typing... ⏳") 
                 full_response = ""
                 
-                # Prepare messages for API
-                api_messages_payload = [{"role": "system", "content": system_prompt_with_data}]
-                # Send recent history including the latest user message
-                # Using [-9:] to ensure system prompt + 8 previous user/assistant messages + current user message
-                history_plus_current = st.session_state.messages[-8:] 
-                for msg_content in history_plus_current:
-                     api_messages_payload.append({"role": msg_content["role"], "content": msg_content["content"]})
-                # Add the current user query explicitly if it's not already in history_plus_current
-                if st.session_state.messages[-1]["role"] == "user" and st.session_state.messages[-1] not in history_plus_current:
-                     api_messages_payload.append({"role": "user", "content": st.session_state.messages[-1]["content"]})
-
+                # Prepare messages for API: system prompt + recent history (already ends with the latest user message)
+                tail = list(st.session_state.messages)[-8:]
+                system_prompt = system_prompt_for(tail)
+                api_messages_payload = [{"role": "system", "content": system_prompt}] + [
+                    {"role": m["role"], "content": m["content"]} for m in tail
+                ]
 
                 try:
-                    for content_chunk in generate_response_stream(api_messages_payload):
-                        full_response += content_chunk
-                        message_placeholder.markdown(full_response + "▌")
-                    message_placeholder.markdown(full_response) # Final response
+                    # st.write_stream batches frontend updates and returns the full text
+                    with message_placeholder.container():
+                        full_response = st.write_stream(generate_response_stream(api_messages_payload))
                 except Exception as e:
                     full_response = f"😔 I apologize, but I encountered an error: {e}."
                     message_placeholder.error(full_response)
                 
-                st.session_state.messages.append({"role": "assistant", "content": full_response})
+                add_message("assistant", full_response)
                 st.session_state.processing = False
                 st.session_state.auto_scroll = True 
                 st.rerun() # Only rerun AFTER bot response is complete to update UI and process next actions
@@ -487,38 +641,21 @@ with col2:
     # Sidebar information
     st.markdown("### 📊 Quick Stats")
     
-    # Product stats
-    total_products = len(products)
-    in_stock_products = len([p for p in products if p.get('in_stock', False)])
+    stats = compute_stats()
     
-    st.metric("Total Products", total_products)
-    st.metric("In Stock", in_stock_products)
-    st.metric("Categories", len(set(p['category'] for p in products)))
+    # Product stats
+    st.metric("Total Products", stats["total_products"])
+    st.metric("In Stock", stats["in_stock_products"])
+    st.metric("Categories", stats["categories"])
     
     # Order stats
     if orders:
-        st.metric("Total Orders", len(orders))
-        pending_orders = len([o for o in orders if o['status'] in ['Processing', 'In Transit']])
-        st.metric("Active Orders", pending_orders)
+        st.metric("Total Orders", stats["total_orders"])
+        st.metric("Active Orders", stats["active_orders"])
 
     # Quick actions in sidebar - set trigger, don't rerun here
     st.markdown("### 🚀 Quick Actions")
-    # FIX: Add st.rerun() to sidebar quick action buttons to ensure single click functionality
-    if st.button("📦 Track Order", disabled=st.session_state.processing, key="qa_track_order"):
-        st.session_state.quick_action_trigger = "I want to track my order"
-        st.rerun() # Trigger a rerun to process the quick action immediately
-    
-    if st.button("🛍️ Product Info", disabled=st.session_state.processing, key="qa_prod_info"):
-        st.session_state.quick_action_trigger = "Show me popular products"
-        st.rerun() # Trigger a rerun to process the quick action immediately
-
-    if st.button("🔄 Return Item", disabled=st.session_state.processing, key="qa_return_item"):
-        st.session_state.quick_action_trigger = "I want to return an item"
-        st.rerun() # Trigger a rerun to process the quick action immediately
-
-    if st.button("💳 Payment Help", disabled=st.session_state.processing, key="qa_payment_help"):
-        st.session_state.quick_action_trigger = "What payment methods do you accept?"
-        st.rerun() # Trigger a rerun to process the quick action immediately
+    render_quick_action_buttons(SIDEBAR_QUICK_ACTIONS, "qa")
 
 # Auto-scroll to bottom if needed
 if st.session_state.auto_scroll:
@@ -531,24 +668,7 @@ if st.session_state.auto_scroll:
 with st.sidebar:
     st.markdown("### 🎯 Testing Scenarios")
     
-    test_queries = [
-        "What is the status of order ORD12345?",
-        "Tell me about the Smartwatch Pro X", 
-        "How do I return the Bluetooth headphones?",
-        "Show me electronics products",
-        "What's the refund status for order ORD12348?",
-        "मेरा ऑर्डर ORD12346 कहाँ है?",
-        "Which products have the best ratings?",
-        "Can I change my delivery address?", 
-        "What payment methods do you accept?",
-        "Show me products under ₹100"
-    ]
-    
-    for query_idx, query_text in enumerate(test_queries): # Use enumerate for unique keys
-        # FIX: Add st.rerun() to test query buttons to ensure single click functionality
-        if st.button(query_text, key=f"test_query_{query_idx}", disabled=st.session_state.processing):
-            st.session_state.quick_action_trigger = query_text
-            st.rerun() # Trigger a rerun to process the quick action immediately
+    render_quick_action_buttons({query: query for query in TEST_QUERIES}, "test_query")
 
     st.markdown("---")
     st.markdown("### 🔧 Features")
@@ -0,0 +1,60 @@
+# lang_kernel.py
+# Numba-compiled language scorer used by detect_language in app.py for long messages.
+# Streamlit re-executes app.py on every rerun, so the kernels live in this imported module:
+# it stays in sys.modules and the compiled dispatchers are reused across reruns.
+from functools import lru_cache
+
+try:
+    import numpy as np
+    from numba import njit
+    AVAILABLE = True
+except ImportError:
+    AVAILABLE = False
+
+_MAX_ENCODED_WORD_LEN = 12  # 27**12 still fits in int64
+
+def _encode_word(word):
+    """Encode a lowercase a-z word as a base-27 integer (exact, no collisions)"""
+    code = 0
+    for ch in word:
+        code = code * 27 + (ord(ch) - 96)
+    return code
+
+if AVAILABLE:
+    @lru_cache(maxsize=None)
+    def _word_codes(words):
+        return np.array(sorted(_encode_word(w) for w in words), dtype=np.int64)
+
+    @njit(cache=True)
+    def _mark_word(code, codes, seen):
+        j = np.searchsorted(codes, code)
+        if j < codes.size and codes[j] == code:
+            seen[j] = True
+
+    @njit(cache=True)
+    def _score(codepoints, hindi_codes, english_codes):
+        """Distinct Hindi minus distinct English words, tokenizing a-z runs in a single pass"""
+        hindi_seen = np.zeros(hindi_codes.size, dtype=np.bool_)
+        english_seen = np.zeros(english_codes.size, dtype=np.bool_)
+        code = 0
+        length = 0
+        for i in range(codepoints.size + 1):
+            c = np.int64(codepoints[i]) if i < codepoints.size else np.int64(0)
+            if 65 <= c <= 90:
+                c += 32
+            if 97 <= c <= 122:
+                if length < _MAX_ENCODED_WORD_LEN:
+                    code = code * 27 + (c - 96)
+                length += 1
+            else:
+                if 0 < length <= _MAX_ENCODED_WORD_LEN:
+                    _mark_word(code, hindi_codes, hindi_seen)
+                    _mark_word(code, english_codes, english_seen)
+                code = 0
+                length = 0
+        return hindi_seen.sum() - english_seen.sum()
+
+def score_language(text, hindi_words, english_words):
+    """Distinct Hindi words minus distinct English words in text (word sets must be frozensets)"""
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return int(_score(codepoints, _word_codes(hindi_words), _word_codes(english_words)))
@@ -69,19 +69,25 @@ Here are your key capabilities and guidelines:
 
 # Example of how product data can be passed (will be done in app.py)
 PRODUCT_DATA_INSTRUCTION = """
-Here is the available product information:
+Here is the available product information (CSV with a header row):
 {product_data}
 
 Use this data to answer product-related queries. Include ratings, reviews count, and stock status when relevant.
 """
 
 ORDER_DATA_INSTRUCTION = """
-Here is the available order information:
+Here is the available order information (CSV with a header row):
 {order_data}
 
 Use this data to answer order-related queries. Provide detailed tracking information and status updates when available.
 """
 
+# Used instead of ORDER_DATA_INSTRUCTION when the conversation mentions no known order ID
+NO_ORDER_DATA_INSTRUCTION = """
+No order ID from the conversation matches our records, so no order information is available yet.
+For order-related queries, ask the customer for their order ID (e.g. ORD12345).
+"""
+
 # Common query types example (for your internal reference, not for LLM directly in this prompt)
 COMMON_QUERY_TYPES = [
     "Order Status",